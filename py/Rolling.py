@@ -1,14 +1,33 @@
+import functools
+import hashlib
 import logging
 import os
 import secrets
-from typing import Iterable, List, Sequence
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Callable, Hashable, Iterator, List, TypeVar
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import BotoCoreError, ClientError, NoCredentialsError
-from flask import Flask, abort, render_template_string, request
-from werkzeug.wrappers import Response
+from flask import Flask, Response, abort, request
+from flask_compress import Compress
+from markupsafe import Markup, escape
 
 app = Flask(__name__)
+app.config.update(
+    COMPRESS_MIMETYPES=["text/html"],
+    # The home page is streamed, so only the streaming codec list applies; gzip is
+    # added so clients that only accept gzip still get a compressed page
+    COMPRESS_ALGORITHM_STREAMING=["zstd", "br", "gzip", "deflate"],
+    COMPRESS_LEVEL=5,
+    COMPRESS_BR_LEVEL=5,
+    COMPRESS_ZSTD_LEVEL=5,
+    # Compression is applied from add_security_headers so it can skip SETUP_RESPONSE
+    COMPRESS_REGISTER=False,
+)
+compress = Compress(app)
 
 logging.basicConfig(level=os.getenv("ROLLING_LOG_LEVEL", "INFO"))
 logger = logging.getLogger(__name__)
@@ -16,12 +35,32 @@ logger = logging.getLogger(__name__)
 # Default to us-east-1 (developer can override with AWS_REGION / AWS_DEFAULT_REGION)
 REGION = os.getenv("AWS_REGION", os.getenv("AWS_DEFAULT_REGION", "us-east-1"))
 API_KEY = os.getenv("ROLLING_API_KEY")
+# Compare fixed-size digests so the check neither re-encodes the key per request
+# nor leaks the configured key's length through compare_digest timing
+API_KEY_DIGEST = hashlib.sha256(API_KEY.encode("utf-8")).digest() if API_KEY else None
+# Seconds a collected AWS listing is reused before hitting the API again
+CACHE_TTL = float(os.getenv("ROLLING_CACHE_TTL", "20"))
 
 # Use the default AWS credential chain (env vars, ~/.aws/credentials, IAM role, etc.)
 session = boto3.Session(region_name=REGION)
-ec2_client = session.client("ec2")
-elb_client = session.client("elbv2")
-sts_client = session.client("sts")
+# Sized so the parallel describe calls in home() never wait on the HTTPS pool;
+# keep-alive keeps those sockets warm between page loads
+client_config = Config(
+    max_pool_connections=16,
+    retries={"mode": "adaptive", "max_attempts": 5},
+    tcp_keepalive=True,
+    connect_timeout=3,
+    read_timeout=15,
+)
+ec2_client = session.client("ec2", config=client_config)
+elb_client = session.client("elbv2", config=client_config)
+sts_client = session.client("sts", config=client_config)
+
+# The four describe calls are independent and IO-bound, so run them side by side.
+# Only SingleFlight leaders run here (request threads wait on their Futures), so
+# at most one call per collector is in flight however many request threads there
+# are; the spare four cover fetches still finishing after a cache flush.
+executor = ThreadPoolExecutor(max_workers=8, thread_name_prefix="aws-collect")
 
 SETUP_HTML = """
 <html>
@@ -68,117 +107,292 @@ echo $env:AWS_DEFAULT_REGION</code></pre>
 </html>
 """
 
-def _paginate(
-    client,
-    operation: str,
-    result_keys: Sequence[str],
-    *,
-    pagination_kwargs: dict | None = None,
-    operation_kwargs: dict | None = None,
-) -> Iterable[dict]:
-    paginator = client.get_paginator(operation)
-    for page in paginator.paginate(**(operation_kwargs or {}), **(pagination_kwargs or {})):
-        data = page
-        for key in result_keys:
-            data = data.get(key, [])
-        if isinstance(data, list):
-            yield from data
-        else:
-            logger.debug("Unexpected paginator data shape for %s -> %s", operation, result_keys)
-
-
-def _collect_instances() -> List[dict]:
-    items: List[dict] = []
+SECURITY_HEADERS = {
+    "Content-Security-Policy": "default-src 'self'",
+    "Referrer-Policy": "same-origin",
+    "X-Content-Type-Options": "nosniff",
+    "X-Frame-Options": "DENY",
+    "Permissions-Policy": "geolocation=()",
+}
+
+# The setup page is immutable, so build its response (headers included) once
+SETUP_RESPONSE = Response(SETUP_HTML, status=200, mimetype="text/html")
+SETUP_RESPONSE.headers.update(SECURITY_HEADERS)
+
+HOME_HTML = """
+<html>
+<head>
+  <title>AWS Resources</title>
+  <style>
+    body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial, sans-serif; padding: 24px; }
+    h1 { margin-top: 28px; }
+    table { border-collapse: collapse; width: 100%; }
+    th, td { border: 1px solid #ddd; padding: 8px; }
+    th { background: #f6f6f6; text-align: left; }
+    tr:nth-child(even) { background: #fafafa; }
+    .meta { color: #666; font-size: 12px; margin-bottom: 16px; }
+    .id { font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, "Liberation Mono", monospace; }
+  </style>
+</head>
+<body>
+  <h1>AWS Resources</h1>
+  <div class="meta">Region: {{ region }} • Account: <span class="id">{{ account }}</span> • Caller: <span class="id">{{ arn }}</span></div>
+
+  <h1>EC2 Instances</h1>
+  <table>
+    <tr><th>ID</th><th>State</th><th>Type</th><th>Public IP</th></tr>
+    {% for id, state, type, public_ip in zip(instance_data.ID, instance_data.State, instance_data.Type, instance_data.PublicIP) %}
+      <tr><td class="id">{{ id }}</td><td>{{ state }}</td><td>{{ type }}</td><td>{{ public_ip }}</td></tr>
+    {% endfor %}
+    {% if instance_data.ID|length == 0 %}<tr><td colspan="4">No running instances.</td></tr>{% endif %}
+  </table>
+
+  <h1>VPCs</h1>
+  <table>
+    <tr><th>VPC ID</th><th>CIDR</th></tr>
+    {% for v in vpc_data %}<tr><td class="id">{{ v[0] }}</td><td>{{ v[1] }}</td></tr>{% endfor %}
+    {% if vpc_data|length == 0 %}<tr><td colspan="2">No VPCs found.</td></tr>{% endif %}
+  </table>
+
+  <h1>Load Balancers</h1>
+  <table>
+    <tr><th>LB Name</th><th>DNS Name</th></tr>
+    {% for lb in lb_data %}<tr><td>{{ lb[0] }}</td><td class="id">{{ lb[1] }}</td></tr>{% endfor %}
+    {% if lb_data|length == 0 %}<tr><td colspan="2">No load balancers found.</td></tr>{% endif %}
+  </table>
+
+  <h1>Available AMIs (Owned by Account)</h1>
+  <table>
+    <tr><th>AMI ID</th><th>Name</th></tr>
+    {% for a in ami_data %}<tr><td class="id">{{ a[0] }}</td><td>{{ a[1] }}</td></tr>{% endfor %}
+    {% if ami_data|length == 0 %}<tr><td colspan="2">No AMIs found.</td></tr>{% endif %}
+  </table>
+</body>
+</html>
+"""
+
+# The page source never changes at runtime: compile it once instead of per request
+app.config["TEMPLATES_AUTO_RELOAD"] = False
+app.jinja_env.auto_reload = False
+app.jinja_env.globals["zip"] = zip
+HOME_TEMPLATE = app.jinja_env.from_string(HOME_HTML)
+# Template events joined per streamed chunk (roughly 40 table rows)
+STREAM_BUFFER_ITEMS = 400
+
+T = TypeVar("T")
+
+# Instances are stored column-wise (one list per column, zipped back together
+# in the template); the two-column tables are lists of (ID/name, CIDR/DNS/name)
+# tuples. Cells are HTML-escaped once at collection (and cached with the data),
+# so autoescaping in the template passes the Markup through without rescanning.
+InstanceColumns = dict[str, List[Markup]]
+PairRow = tuple[Markup, Markup]
+
+# Shared defaults for fields AWS omits. Already Markup, so escape() hands them
+# straight back, and no placeholder dict is built for instances without a State.
+_NA = Markup("N/A")
+_UNKNOWN = Markup("unknown")
+_NO_STATE: dict = {}
+
+class SingleFlight:
+    """Coalesce concurrent calls that share a key into one execution.
+
+    The first caller submits the function to the executor; callers arriving
+    while it is in flight get the same Future and so the same result or
+    exception. Only leaders occupy executor threads, so waiters can never
+    queue behind each other and start a second round of calls.
+    """
+
+    def __init__(self, pool: ThreadPoolExecutor) -> None:
+        self._pool = pool
+        self._lock = threading.Lock()
+        self._calls: dict[Hashable, Future] = {}
+
+    def submit(self, key: Hashable, func: Callable[[], T]) -> "Future[T]":
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = self._pool.submit(func)
+        if leader:
+            # Outside the lock: the callback runs inline if func already finished
+            future.add_done_callback(functools.partial(self._forget, key))
+        return future
+
+    def _forget(self, key: Hashable, future: Future) -> None:
+        with self._lock:
+            if self._calls.get(key) is future:
+                del self._calls[key]
+
+
+_cache: dict[tuple[str, str], tuple[float, object]] = {}
+# Bumped by /_admin/flush-cache so fetches started before a flush neither store
+# their result nor get joined by callers arriving after it
+_cache_generation = 0
+_cache_generation_lock = threading.Lock()
+_single_flight = SingleFlight(executor)
+
+
+def _ttl_cached(func: Callable[[], T]) -> Callable[[], T]:
+    """Reuse the result of an AWS collector for CACHE_TTL seconds.
+
+    Misses go through SingleFlight, so a burst of refreshes shares one
+    upstream call (and its failure) instead of queueing up repeats. The
+    returned function also has a ``submit()`` returning a Future, which is
+    what home() uses to wait on all collectors at once.
+    """
+
+    def load(key: tuple[str, str], generation: int) -> T:
+        value = func()
+        with _cache_generation_lock:
+            if generation == _cache_generation:
+                _cache[key] = (time.monotonic() + CACHE_TTL, value)
+        return value
+
+    def submit() -> "Future[T]":
+        key = (REGION, func.__name__)
+        entry = _cache.get(key)
+        if entry is not None and entry[0] > time.monotonic():
+            cached: Future = Future()
+            cached.set_result(entry[1])
+            return cached
+        generation = _cache_generation
+        return _single_flight.submit((*key, generation), functools.partial(load, key, generation))
+
+    @functools.wraps(func)
+    def wrapper() -> T:
+        return submit().result()
+
+    wrapper.submit = submit  # type: ignore[attr-defined]
+    return wrapper
+
+
+# Each listing follows its continuation token by hand: the botocore paginator
+# adds noticeable per-page overhead for large result sets (boto3#2552)
+def _iter_reservations() -> Iterator[dict]:
+    kwargs: dict = {
+        "Filters": [{"Name": "instance-state-name", "Values": ["running"]}],
+        "MaxResults": 1000,
+    }
+    while True:
+        page = ec2_client.describe_instances(**kwargs)
+        yield from page.get("Reservations", [])
+        if not page.get("NextToken"):
+            return
+        kwargs["NextToken"] = page["NextToken"]
+
+
+def _iter_load_balancers() -> Iterator[dict]:
+    kwargs: dict = {"PageSize": 400}
+    while True:
+        page = elb_client.describe_load_balancers(**kwargs)
+        yield from page.get("LoadBalancers", [])
+        if not page.get("NextMarker"):
+            return
+        kwargs["Marker"] = page["NextMarker"]
+
+
+def _iter_images() -> Iterator[dict]:
+    # Only available images are shown, so let EC2 drop pending/failed ones server-side
+    kwargs: dict = {
+        "Owners": ["self"],
+        "Filters": [{"Name": "state", "Values": ["available"]}],
+        "MaxResults": 1000,
+    }
+    while True:
+        page = ec2_client.describe_images(**kwargs)
+        yield from page.get("Images", [])
+        if not page.get("NextToken"):
+            return
+        kwargs["NextToken"] = page["NextToken"]
+
+
+@_ttl_cached
+def _collect_instances() -> InstanceColumns:
+    ids: List[Markup] = []
+    states: List[Markup] = []
+    types: List[Markup] = []
+    public_ips: List[Markup] = []
     try:
-        for reservation in _paginate(
-            ec2_client,
-            "describe_instances",
-            result_keys=("Reservations",),
-            operation_kwargs={
-                "Filters": [{"Name": "instance-state-name", "Values": ["running"]}],
-            },
-        ):
+        for reservation in _iter_reservations():
             for instance in reservation.get("Instances", []):
-                items.append(
-                    {
-                        "ID": instance.get("InstanceId", "N/A"),
-                        "State": instance.get("State", {}).get("Name", "unknown"),
-                        "Type": instance.get("InstanceType", "unknown"),
-                        "Public IP": instance.get("PublicIpAddress", "N/A"),
-                    }
-                )
+                ids.append(escape(instance.get("InstanceId", _NA)))
+                states.append(escape(instance.get("State", _NO_STATE).get("Name", _UNKNOWN)))
+                types.append(escape(instance.get("InstanceType", _UNKNOWN)))
+                public_ips.append(escape(instance.get("PublicIpAddress", _NA)))
     except (BotoCoreError, ClientError) as exc:
-        logger.exception("Failed to collect EC2 instances")
+        logger.error("Failed to collect EC2 instances: %s", exc)
         raise exc
-    return items
+    return {"ID": ids, "State": states, "Type": types, "PublicIP": public_ips}
 
 
-def _collect_vpcs() -> List[dict]:
+@_ttl_cached
+def _collect_vpcs() -> List[PairRow]:
     try:
         vpcs_resp = ec2_client.describe_vpcs()
     except (BotoCoreError, ClientError) as exc:
-        logger.exception("Failed to collect VPCs")
+        logger.error("Failed to collect VPCs: %s", exc)
         raise exc
 
     return [
-        {"VPC ID": vpc.get("VpcId", "N/A"), "CIDR": vpc.get("CidrBlock", "N/A")}
+        (escape(vpc.get("VpcId", _NA)), escape(vpc.get("CidrBlock", _NA)))
         for vpc in vpcs_resp.get("Vpcs", [])
     ]
 
 
-def _collect_load_balancers() -> List[dict]:
-    items: List[dict] = []
+@_ttl_cached
+def _collect_load_balancers() -> List[PairRow]:
     try:
-        for load_balancer in _paginate(elb_client, "describe_load_balancers", result_keys=("LoadBalancers",)):
-            items.append(
-                {
-                    "LB Name": load_balancer.get("LoadBalancerName", "N/A"),
-                    "DNS Name": load_balancer.get("DNSName", "N/A"),
-                }
+        return [
+            (
+                escape(load_balancer.get("LoadBalancerName", _NA)),
+                escape(load_balancer.get("DNSName", _NA)),
             )
+            for load_balancer in _iter_load_balancers()
+        ]
     except (BotoCoreError, ClientError) as exc:
-        logger.exception("Failed to collect load balancers")
+        logger.error("Failed to collect load balancers: %s", exc)
         raise exc
-    return items
 
 
-def _collect_amis() -> List[dict]:
-    items: List[dict] = []
+@_ttl_cached
+def _collect_amis() -> List[PairRow]:
     try:
-        for image in _paginate(
-            ec2_client,
-            "describe_images",
-            result_keys=("Images",),
-            operation_kwargs={"Owners": ["self"]},
-        ):
-            items.append({"AMI ID": image.get("ImageId", "N/A"), "Name": image.get("Name", "N/A")})
+        return [
+            (escape(image.get("ImageId", _NA)), escape(image.get("Name", _NA)))
+            for image in _iter_images()
+        ]
     except (BotoCoreError, ClientError) as exc:
-        logger.exception("Failed to collect AMIs")
+        logger.error("Failed to collect AMIs: %s", exc)
         raise exc
-    return items
+
+
+# Unpacked in home() in this order: instances, VPCs, load balancers, AMIs
+COLLECTORS = (_collect_instances, _collect_vpcs, _collect_load_balancers, _collect_amis)
 
 
 def _fetch_identity() -> tuple[str, str]:
     whoami = sts_client.get_caller_identity()
-    return whoami.get("Account", "unknown"), whoami.get("Arn", "unknown")
+    return whoami.get("Account", _UNKNOWN), whoami.get("Arn", _UNKNOWN)
 
 
 @app.after_request
 def add_security_headers(response: Response) -> Response:
-    response.headers.setdefault("Content-Security-Policy", "default-src 'self'")
-    response.headers.setdefault("Referrer-Policy", "same-origin")
-    response.headers.setdefault("X-Content-Type-Options", "nosniff")
-    response.headers.setdefault("X-Frame-Options", "DENY")
-    response.headers.setdefault("Permissions-Policy", "geolocation=()")
-    return response
+    if response is SETUP_RESPONSE:
+        return response
+    for name, value in SECURITY_HEADERS.items():
+        response.headers.setdefault(name, value)
+    # The repeated table markup compresses very well; the shared SETUP_RESPONSE
+    # above must never be rewritten in place, so it is not compressed
+    return compress.after_request(response)
 
 
 @app.before_request
 def require_api_key() -> None:
-    if not API_KEY:
+    if API_KEY_DIGEST is None:
         abort(503, description="ROLLING_API_KEY is not set.")
-    provided = request.headers.get("X-API-Key", "")
-    if not secrets.compare_digest(provided, API_KEY):
+    provided = request.headers.get("X-API-Key", "").encode("utf-8", "replace")
+    if not secrets.compare_digest(hashlib.sha256(provided).digest(), API_KEY_DIGEST):
         abort(401, description="Unauthorized.")
 
 
@@ -189,69 +403,18 @@ def home():
         account, arn = _fetch_identity()
     except (NoCredentialsError, ClientError, BotoCoreError):
         # Show inline PowerShell instructions
-        return SETUP_HTML, 200
+        return SETUP_RESPONSE
 
+    futures = [collect.submit() for collect in COLLECTORS]
     try:
-        instances = _collect_instances()
-        vpc_data = _collect_vpcs()
-        lb_data = _collect_load_balancers()
-        ami_data = _collect_amis()
+        instances, vpc_data, lb_data, ami_data = [future.result() for future in futures]
     except (BotoCoreError, ClientError):
         abort(502, description="Failed to query AWS APIs. Please try again later.")
 
-    html = """
-    <html>
-    <head>
-      <title>AWS Resources</title>
-      <style>
-        body { font-family: system-ui, -apple-system, Segoe UI, Roboto, Helvetica, Arial, sans-serif; padding: 24px; }
-        h1 { margin-top: 28px; }
-        table { border-collapse: collapse; width: 100%; }
-        th, td { border: 1px solid #ddd; padding: 8px; }
-        th { background: #f6f6f6; text-align: left; }
-        tr:nth-child(even) { background: #fafafa; }
-        .meta { color: #666; font-size: 12px; margin-bottom: 16px; }
-        .id { font-family: ui-monospace, SFMono-Regular, Menlo, Consolas, "Liberation Mono", monospace; }
-      </style>
-    </head>
-    <body>
-      <h1>AWS Resources</h1>
-      <div class="meta">Region: {{ region }} • Account: <span class="id">{{ account }}</span> • Caller: <span class="id">{{ arn }}</span></div>
-
-      <h1>EC2 Instances</h1>
-      <table>
-        <tr><th>ID</th><th>State</th><th>Type</th><th>Public IP</th></tr>
-        {% for i in instance_data %}
-          <tr><td class="id">{{ i['ID'] }}</td><td>{{ i['State'] }}</td><td>{{ i['Type'] }}</td><td>{{ i['Public IP'] }}</td></tr>
-        {% endfor %}
-        {% if instance_data|length == 0 %}<tr><td colspan="4">No running instances.</td></tr>{% endif %}
-      </table>
-
-      <h1>VPCs</h1>
-      <table>
-        <tr><th>VPC ID</th><th>CIDR</th></tr>
-        {% for v in vpc_data %}<tr><td class="id">{{ v['VPC ID'] }}</td><td>{{ v['CIDR'] }}</td></tr>{% endfor %}
-        {% if vpc_data|length == 0 %}<tr><td colspan="2">No VPCs found.</td></tr>{% endif %}
-      </table>
-
-      <h1>Load Balancers</h1>
-      <table>
-        <tr><th>LB Name</th><th>DNS Name</th></tr>
-        {% for lb in lb_data %}<tr><td>{{ lb['LB Name'] }}</td><td class="id">{{ lb['DNS Name'] }}</td></tr>{% endfor %}
-        {% if lb_data|length == 0 %}<tr><td colspan="2">No load balancers found.</td></tr>{% endif %}
-      </table>
-
-      <h1>Available AMIs (Owned by Account)</h1>
-      <table>
-        <tr><th>AMI ID</th><th>Name</th></tr>
-        {% for a in ami_data %}<tr><td class="id">{{ a['AMI ID'] }}</td><td>{{ a['Name'] }}</td></tr>{% endfor %}
-        {% if ami_data|length == 0 %}<tr><td colspan="2">No AMIs found.</td></tr>{% endif %}
-      </table>
-    </body>
-    </html>
-    """
-    return render_template_string(
-        html,
+    # Stream the page as Jinja renders it so large accounts never hold the whole
+    # HTML document in memory alongside the collected rows. Jinja emits one tiny
+    # item per template event, so buffer them into writes of a few KB each.
+    stream = HOME_TEMPLATE.stream(
         region=REGION,
         account=account,
         arn=arn,
@@ -260,6 +423,22 @@ def home():
         lb_data=lb_data,
         ami_data=ami_data,
     )
-
+    stream.enable_buffering(STREAM_BUFFER_ITEMS)
+    return Response(stream, mimetype="text/html")
+
+
+@app.route("/_admin/flush-cache", methods=["POST"])
+def flush_cache():
+    global _cache_generation
+    with _cache_generation_lock:
+        _cache_generation += 1
+        _cache.clear()
+    return "", 204
+
+# Local development only. In production (see Dockerfile) serve from one process with
+# many threads so requests waiting on the shared AWS fetches don't block each other:
+# gunicorn -k gthread -w 1 --threads 32 Rolling:app
+# Keep a single worker: the TTL cache and SingleFlight live in process memory, so extra
+# workers would each call AWS on their own and /_admin/flush-cache would clear only one.
 if __name__ == "__main__":
     app.run(host="0.0.0.0", port=int(os.getenv("PORT", "5001")), debug=False)
@@ -0,0 +1,68 @@
+import os
+import threading
+import time
+import unittest
+
+from botocore.exceptions import ClientError
+
+os.environ.setdefault("ROLLING_API_KEY", "test-key")
+
+import Rolling  # noqa: E402
+
+
+class FakeClient:
+    """Stands in for the ec2/elbv2/sts clients; describe_vpcs is slow and throttled."""
+
+    def __init__(self) -> None:
+        self.vpc_calls = 0
+        self._lock = threading.Lock()
+
+    def get_caller_identity(self) -> dict:
+        return {"Account": "123456789012", "Arn": "arn:aws:iam::123456789012:user/test"}
+
+    def describe_instances(self, **kwargs) -> dict:
+        return {"Reservations": []}
+
+    def describe_load_balancers(self, **kwargs) -> dict:
+        return {"LoadBalancers": []}
+
+    def describe_images(self, **kwargs) -> dict:
+        return {"Images": []}
+
+    def describe_vpcs(self, **kwargs) -> dict:
+        with self._lock:
+            self.vpc_calls += 1
+        time.sleep(0.3)
+        raise ClientError({"Error": {"Code": "Throttling", "Message": "Rate exceeded"}}, "DescribeVpcs")
+
+
+class BurstTest(unittest.TestCase):
+    def setUp(self) -> None:
+        self.client = FakeClient()
+        self.originals = (Rolling.ec2_client, Rolling.elb_client, Rolling.sts_client)
+        Rolling.ec2_client = Rolling.elb_client = Rolling.sts_client = self.client
+        self.app = Rolling.app.test_client()
+        self.app.post("/_admin/flush-cache", headers={"X-API-Key": Rolling.API_KEY})
+
+    def tearDown(self) -> None:
+        Rolling.ec2_client, Rolling.elb_client, Rolling.sts_client = self.originals
+
+    def test_concurrent_requests_share_one_failing_upstream_call(self) -> None:
+        statuses: list[int] = []
+
+        def hit() -> None:
+            response = Rolling.app.test_client().get("/", headers={"X-API-Key": Rolling.API_KEY})
+            statuses.append(response.status_code)
+
+        threads = [threading.Thread(target=hit) for _ in range(32)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(statuses, [502] * 32)
+        self.assertEqual(self.client.vpc_calls, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()